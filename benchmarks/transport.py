@@ -0,0 +1,187 @@
+"""Compare the aiohttp and HTTPX (h2c) transports of a generated client.
+
+A client is generated for a single GET operation and run against a local
+hypercorn server, which speaks HTTP/1.1 and h2c on the same port. Server and
+client share one process. Requires hypercorn and httpx[http2]:
+
+    python benchmarks/transport.py --requests 5000 --concurrency 64 512
+"""
+
+import argparse
+import asyncio
+import importlib
+import json
+import os
+import sys
+import tempfile
+import time
+
+from hypercorn.asyncio import serve
+from hypercorn.config import Config
+
+from mahou.parsers.openapi import OpenAPIParser
+from mahou.serializers.aiohttp_client import OpenAPIaiohttpClientSerializer
+from mahou.serializers.model import OpenAPIModelSerializer
+
+SPEC = {
+    "openapi": "3.1.0",
+    "info": {"title": "Bench", "version": "1"},
+    "paths": {
+        "/items/{id}": {
+            "get": {
+                "operationId": "get_item",
+                "tags": ["items"],
+                "parameters": [
+                    {
+                        "name": "id",
+                        "in": "path",
+                        "required": True,
+                        "schema": {"type": "integer", "title": "Id"},
+                    }
+                ],
+                "responses": {
+                    "200": {
+                        "content": {
+                            "application/json": {
+                                "schema": {"$ref": "#/components/schemas/Item"}
+                            }
+                        }
+                    }
+                },
+            }
+        }
+    },
+    "components": {
+        "schemas": {
+            "Item": {
+                "title": "Item",
+                "type": "object",
+                "required": ["id", "name"],
+                "properties": {
+                    "id": {"type": "integer", "title": "Id"},
+                    "name": {"type": "string", "title": "Name"},
+                },
+            }
+        }
+    },
+}
+
+ITEM = b'{"id": 1, "name": "x"}'
+
+
+def generate_client(directory: str):
+    server = OpenAPIParser().parse(json.dumps(SPEC))
+    package = os.path.join(directory, "bench_client")
+    os.makedirs(package)
+    with open(os.path.join(package, "__init__.py"), "w"):
+        pass
+    with open(os.path.join(package, "model.py"), "w") as fp:
+        fp.write(OpenAPIModelSerializer().serialize(list(server.schemas.values())))
+    with open(os.path.join(package, "client.py"), "w") as fp:
+        fp.write(OpenAPIaiohttpClientSerializer().serialize(server))
+    sys.path.insert(0, directory)
+    return importlib.import_module("bench_client.client")
+
+
+class Server:
+    def __init__(self, latency: float):
+        self.latency = latency
+        self.connections = set()
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return
+        self.connections.add(scope["client"])
+        while (await receive()).get("more_body"):
+            pass
+        await asyncio.sleep(self.latency)
+        await send(
+            {
+                "type": "http.response.start",
+                "status": 200,
+                "headers": [(b"content-type", b"application/json")],
+            }
+        )
+        await send({"type": "http.response.body", "body": ITEM})
+
+
+async def run(session, server: Server, requests: int, concurrency: int) -> str:
+    server.connections.clear()
+    latencies = []
+    remaining = iter(range(requests))
+
+    async with session:
+
+        async def worker():
+            for _ in remaining:
+                start = time.perf_counter()
+                await session.items.get_item(1)
+                latencies.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        duration = time.perf_counter() - start
+
+    latencies.sort()
+    return (
+        f"connections={len(server.connections)} "
+        f"requests/s={requests / duration:.0f} "
+        + " ".join(
+            f"p{p}={latencies[min(int(requests * p / 100), requests - 1)] * 1000:.1f}ms"
+            for p in (50, 99, 99.9)
+        )
+    )
+
+
+async def bench(args: argparse.Namespace):
+    with tempfile.TemporaryDirectory() as directory:
+        client = generate_client(directory)
+
+        server = Server(args.latency)
+        config = Config()
+        config.bind = [f"127.0.0.1:{args.port}"]
+        config.accesslog = None
+        config.loglevel = "ERROR"
+        config.h2_max_concurrent_streams = 1024
+        # the defaults close connections mid-run, h2c does not recover from it
+        config.keep_alive_timeout = 60
+        config.keep_alive_max_requests = 2**31
+        stop = asyncio.Event()
+        serving = asyncio.create_task(serve(server, config, shutdown_trigger=stop.wait))
+        await asyncio.sleep(0.5)
+
+        url = f"http://127.0.0.1:{args.port}"
+        try:
+            for concurrency in args.concurrency:
+                aiohttp_session = client.get_session(url)
+                print(
+                    f"{concurrency} concurrent, aiohttp: "
+                    + await run(aiohttp_session, server, args.requests, concurrency)
+                )
+                httpx_session = client.get_session(
+                    url, transport=client.HTTPXTransport(http1=False)
+                )
+                print(
+                    f"{concurrency} concurrent, httpx h2c: "
+                    + await run(httpx_session, server, args.requests, concurrency)
+                )
+        finally:
+            stop.set()
+            await serving
+
+
+def main():
+    argparser = argparse.ArgumentParser(
+        description="Compare the aiohttp and HTTPX (h2c) transports"
+    )
+    argparser.add_argument("--requests", type=int, default=5000)
+    argparser.add_argument("--concurrency", type=int, nargs="+", default=[64, 512])
+    argparser.add_argument(
+        "--latency", type=float, default=0.005, help="server latency in seconds"
+    )
+    argparser.add_argument("--port", type=int, default=8799)
+    asyncio.run(bench(argparser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,215 @@
+import os
+from collections import Counter
+from collections.abc import Hashable
+from dataclasses import dataclass
+
+from mahou.models.openapi import (
+    ArrayType,
+    ComplexSchema,
+    EnumSchema,
+    PrimitiveType,
+    Schema,
+    Server,
+    SimpleSchema,
+    UnionType,
+)
+from mahou.serializers.aiohttp_client import OpenAPIaiohttpClientSerializer
+from mahou.serializers.model import OpenAPIModelSerializer
+
+SHARED_MODULE = "shared"
+
+
+@dataclass
+class SchemaConflict:
+    name: str
+    # server titles grouped by structurally identical variant, most common first
+    variants: list[list[str]]
+    # whether the first variant is shared, false when no two servers agree on it
+    shared: bool
+
+
+@dataclass
+class SharedSchemas:
+    schemas: dict[str, Schema]
+    # remaining schemas of each input server, in input order
+    local_schemas: list[dict[str, Schema]]
+    # titles of the shared schemas each input server uses, in input order
+    shared_types: list[set[str]]
+    conflicts: list[SchemaConflict]
+
+
+def schema_signature(
+    schema: PrimitiveType | ArrayType | UnionType | Schema,
+) -> Hashable:
+    """Hashable description of everything that ends up in the generated code"""
+    if isinstance(schema, PrimitiveType):
+        return schema.value
+    elif isinstance(schema, ArrayType):
+        return ("array", schema_signature(schema.items))
+    elif isinstance(schema, UnionType):
+        return ("union", tuple(schema_signature(t) for t in schema.any_of))
+    elif isinstance(schema, SimpleSchema):
+        # the title of a simple schema is never rendered
+        return (
+            "simple",
+            schema_signature(schema.type),
+            tuple(schema.enum) if schema.enum else None,
+            schema.format,
+        )
+    elif isinstance(schema, EnumSchema):
+        return ("enum", schema.title, tuple(schema.enum_values))
+    elif isinstance(schema, ComplexSchema):
+        return (
+            "complex",
+            schema.title,
+            tuple(
+                sorted(
+                    (name, schema_signature(property))
+                    for name, property in schema.properties.items()
+                )
+            ),
+            frozenset(schema.required_properties),
+        )
+    else:
+        raise RuntimeError("Unknown schema")
+
+
+def referenced_schemas(
+    schema: PrimitiveType | ArrayType | UnionType | Schema,
+) -> list[Schema]:
+    """Named schemas the generated code for this schema refers to"""
+    if isinstance(schema, ArrayType):
+        return referenced_schemas(schema.items)
+    elif isinstance(schema, UnionType):
+        return [s for t in schema.any_of for s in referenced_schemas(t)]
+    elif isinstance(schema, SimpleSchema):
+        return referenced_schemas(schema.type)
+    elif isinstance(schema, ComplexSchema):
+        return [
+            s
+            for property in schema.properties.values()
+            for s in (
+                [property]
+                if isinstance(property, ComplexSchema | EnumSchema)
+                else referenced_schemas(property)
+            )
+        ]
+    else:
+        return []
+
+
+def deduplicate_schemas(servers: list[Server]) -> SharedSchemas:
+    """Find the schemas structurally shared by several servers.
+
+    A schema is shared when at least two servers define it with the same
+    structure. When servers disagree on a name, the variant used by the most
+    servers is shared and the conflict is reported; the others stay local.
+    Schemas referring to a schema that could not be shared stay local too.
+    """
+    signatures: list[dict[str, Hashable]] = [
+        {name: schema_signature(schema) for name, schema in server.schemas.items()}
+        for server in servers
+    ]
+
+    names: dict[str, None] = {}
+    for server in servers:
+        names.update(dict.fromkeys(server.schemas))
+
+    shared: dict[str, Schema] = {}
+    shared_signatures: dict[str, Hashable] = {}
+    all_counts: dict[str, Counter[Hashable]] = {}
+    for name in names:
+        counts = all_counts[name] = Counter(s[name] for s in signatures if name in s)
+        ((signature, count),) = counts.most_common(1)
+        if count > 1:
+            index = next(
+                i for i, s in enumerate(signatures) if s.get(name) == signature
+            )
+            shared[name] = servers[index].schemas[name]
+            shared_signatures[name] = signature
+
+    # a shared schema can only refer to the exact shared version of other schemas
+    changed = True
+    while changed:
+        changed = False
+        shared_titles = {shared[n].title: shared_signatures[n] for n in shared}
+        for name, schema in list(shared.items()):
+            if any(
+                shared_titles.get(ref.title) != schema_signature(ref)
+                for ref in referenced_schemas(schema)
+            ):
+                del shared[name]
+                del shared_signatures[name]
+                changed = True
+
+    conflicts = [
+        SchemaConflict(
+            name=name,
+            variants=[
+                [
+                    server.title
+                    for server, s in zip(servers, signatures)
+                    if s.get(name) == variant
+                ]
+                for variant, _ in counts.most_common()
+            ],
+            shared=name in shared,
+        )
+        for name, counts in all_counts.items()
+        if len(counts) > 1
+    ]
+
+    local_schemas = [
+        {
+            name: schema
+            for name, schema in server.schemas.items()
+            if shared_signatures.get(name) != s[name]
+        }
+        for server, s in zip(servers, signatures)
+    ]
+
+    shared_types = [
+        {
+            shared[name].title
+            for name in server.schemas
+            if name in shared and shared_signatures[name] == s[name]
+        }
+        for server, s in zip(servers, signatures)
+    ]
+
+    return SharedSchemas(
+        schemas=shared,
+        local_schemas=local_schemas,
+        shared_types=shared_types,
+        conflicts=conflicts,
+    )
+
+
+def serialize_deduplicated(
+    servers: list[Server], shared: SharedSchemas, packages: list[str]
+) -> dict[str, str]:
+    """Render the shared module and the model and client of each server.
+
+    Paths are relative to the output package: shared.py sits next to one
+    subpackage per server, named after `packages`, so that each model.py and
+    client.py imports the shared types from `..shared`.
+    """
+    outputs = {
+        "__init__.py": "",
+        f"{SHARED_MODULE}.py": OpenAPIModelSerializer().serialize(
+            list(shared.schemas.values())
+        ),
+    }
+    for server, local_schemas, shared_types, package in zip(
+        servers, shared.local_schemas, shared.shared_types, packages, strict=True
+    ):
+        shared_module = f"..{SHARED_MODULE}"
+        outputs[os.path.join(package, "__init__.py")] = ""
+        outputs[os.path.join(package, "model.py")] = OpenAPIModelSerializer(
+            shared_types, shared_module
+        ).serialize(list(local_schemas.values()))
+        outputs[os.path.join(package, "client.py")] = OpenAPIaiohttpClientSerializer(
+            shared_types, shared_module
+        ).serialize(server)
+
+    return outputs
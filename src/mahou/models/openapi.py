@@ -48,6 +48,8 @@ class EnumSchema(Schema):
 class BodySchema(Enum):
     JSON = "application/json"
     FORM = "application/x-www-form-urlencoded"
+    MULTIPART = "multipart/form-data"
+    OCTET_STREAM = "application/octet-stream"
 
 
 @dataclass
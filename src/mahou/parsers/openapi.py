@@ -20,6 +20,14 @@ from mahou.models.openapi import (
 )
 from mahou.parsers.abc import Parser
 
+BODY_SCHEMAS = {body_schema.value for body_schema in BodySchema}
+
+
+def is_json(media_type: str) -> bool:
+    # application/json and structured syntax suffixes like application/problem+json
+    base = media_type.split(";")[0].strip().lower()
+    return base == "application/json" or base.endswith("+json")
+
 
 class OpenAPIParser(Parser[Server]):
     def __init__(self):
@@ -180,11 +188,19 @@ class OpenAPIParser(Parser[Server]):
 
     def request_body_from_json(self, input: dict) -> Variable:
         content = input["content"]
-        body_schema = list(content.keys())[0]
+        supported = [c for c in content if c in BODY_SCHEMAS]
+        body_schema = BodySchema(supported[0] if supported else next(iter(content)))
+        if body_schema is BodySchema.OCTET_STREAM:
+            # raw payloads are streamed as is, whatever their schema
+            body_type = self.binary_schema()
+        else:
+            body_type = self.lookup_schema_from_json(
+                content[body_schema.value]["schema"]
+            )
         return Variable(
             required=input["required"],
-            type=self.lookup_schema_from_json(content[body_schema]["schema"]),
-            body_schema=BodySchema(body_schema),
+            type=body_type,
+            body_schema=body_schema,
         )
 
     def request_parameters_from_json(self, input: dict) -> list[Parameter]:
@@ -208,18 +224,26 @@ class OpenAPIParser(Parser[Server]):
     def request_responses_from_json(self, input: dict) -> dict[int, Schema | None]:
         responses = {}
         for response_code, response_json in input.items():
-            if (
-                "content" in response_json
-                and response_json["content"]["application/json"]["schema"]
-            ):
-                responses[int(response_code)] = self.lookup_schema_from_json(
-                    response_json["content"]["application/json"]["schema"]
+            content = response_json.get("content", {})
+            json_media_type = next(
+                (media_type for media_type in content if is_json(media_type)), None
+            )
+            if json_media_type is not None:
+                json_schema = content[json_media_type].get("schema", None)
+                responses[int(response_code)] = (
+                    self.lookup_schema_from_json(json_schema) if json_schema else None
                 )
+            elif content:
+                # any other media type is downloaded as is
+                responses[int(response_code)] = self.binary_schema()
             else:
                 responses[int(response_code)] = None
 
         return responses
 
+    def binary_schema(self) -> SimpleSchema:
+        return SimpleSchema(title="binary", type=PrimitiveType.STR, format="binary")
+
     def lookup_schema_from_json(self, input: dict) -> Schema:
         if "$ref" in input:
             ref_schema_title = input["$ref"].split("/")[-1]
@@ -2,8 +2,6 @@ import tempfile
 from collections import defaultdict
 from typing import TypedDict, override
 
-from jinja2 import Environment, PackageLoader, select_autoescape
-
 from mahou.models.openapi import (
     ArrayType,
     BodySchema,
@@ -15,7 +13,7 @@ from mahou.models.openapi import (
     UnionType,
 )
 from mahou.serializers.abc import Serializer
-from mahou.utils import ruff_fix, ruff_format
+from mahou.utils import jinja_environment, ruff_fix, ruff_format
 
 STR_FORMATS = {
     "uuid": "UUID",
@@ -29,29 +27,57 @@ STR_FORMATS_IMPORTS = {
 
 FORM_IMPORT = "from dataclasses import asdict"
 
+BINARY_PAYLOAD_TYPE = "BinaryPayload"
+
+BINARY_SINK_ARGUMENTS = [
+    {"name": "sink", "type": "BinarySink"},
+    {"name": "chunk_size", "type": "int"},
+]
+
+
+def is_binary(schema: Schema | None) -> bool:
+    return isinstance(schema, SimpleSchema) and schema.format == "binary"
+
 
 class ServerDefinition(TypedDict):
     name: str
     url: str
+    # name of the generated ClientSession factory
+    factory: str
+
+
+def server_definitions(input: Server) -> list[ServerDefinition]:
+    if len(input.urls) == 1:
+        names = [""]
+    else:
+        names = [url[1:].replace("/", "_") for url in input.urls]
+
+    return [
+        {
+            "name": name,
+            "url": url,
+            "factory": f"get_{name}_session" if name else "get_session",
+        }
+        for name, url in zip(names, input.urls)
+    ]
 
 
 class OpenAPIaiohttpClientSerializer(Serializer[Server]):
-    def __init__(self):
+    def __init__(
+        self, shared_types: set[str] | None = None, shared_module: str = "..shared"
+    ):
         self.need_typing = {}
         self.model_types = set()
         self.extra_imports = set()
+        self.shared_types = shared_types or set()
+        self.shared_module = shared_module
+        self.shared_model_types = set()
 
     @override
     def serialize(self, input: Server) -> str:
-        servers: list[ServerDefinition] = []
+        servers = server_definitions(input)
         modules = defaultdict(list)
 
-        if len(input.urls) == 1:
-            servers.append({"name": "", "url": input.urls[0]})
-        else:
-            for url in input.urls:
-                servers.append({"name": url[1:].replace("/", "_"), "url": url})
-
         for path in input.paths:
             for request in path.requests:
                 operation = {
@@ -67,6 +93,8 @@ class OpenAPIaiohttpClientSerializer(Serializer[Server]):
                     "query_parameters": [],
                     "path_parameters": [],
                     "body": False,
+                    "binary_responses": set(),
+                    "raw_responses": set(),
                 }
 
                 for parameter in request.parameters:
@@ -86,7 +114,11 @@ class OpenAPIaiohttpClientSerializer(Serializer[Server]):
                 if request.body:
                     argument = {
                         "name": "body",
-                        "type": self.serialize_type(request.body.type),
+                        "type": (
+                            BINARY_PAYLOAD_TYPE
+                            if request.body.body_schema is BodySchema.OCTET_STREAM
+                            else self.serialize_type(request.body.type)
+                        ),
                     }
                     operation["body"] = True
                     if request.body.required:
@@ -103,21 +135,39 @@ class OpenAPIaiohttpClientSerializer(Serializer[Server]):
 
                 for response_code, response_type in request.responses.items():
                     if response_code > 199 and response_code < 300:
-                        operation["responses_success"][
-                            response_code
-                        ] = self.serialize_type(response_type)
+                        if is_binary(response_type):
+                            # written to the sink, the result is the size in bytes
+                            operation["binary_responses"].add(response_code)
+                            response_type = SimpleSchema(
+                                title="size", type=PrimitiveType.INT
+                            )
+                        operation["responses_success"][response_code] = (
+                            self.serialize_type(response_type)
+                        )
+                    elif is_binary(response_type):
+                        # error bodies are small, they are kept in memory as is
+                        operation["raw_responses"].add(response_code)
+                        operation["responses_error"][response_code] = "bytes"
                     else:
-                        operation["responses_error"][
-                            response_code
-                        ] = self.serialize_type(response_type)
+                        operation["responses_error"][response_code] = (
+                            self.serialize_type(response_type)
+                        )
+
+                if operation["binary_responses"]:
+                    sink, chunk_size = BINARY_SINK_ARGUMENTS
+                    operation["required_arguments"].append(sink)
+                    operation["optional_arguments"].append(chunk_size)
 
                 for tag in request.tags:
                     modules[tag].append(operation)
 
-        jinja_env = Environment(
-            loader=PackageLoader("mahou"), autoescape=select_autoescape()
-        )
-        template = jinja_env.get_template("aiohttp_client.py.jinja")
+        if self.shared_model_types:
+            self.extra_imports.add(
+                f"from {self.shared_module} import "
+                f"{', '.join(sorted(self.shared_model_types))}"
+            )
+
+        template = jinja_environment().get_template("aiohttp_client.py.jinja")
 
         rendered = template.render(
             servers=servers,
@@ -149,7 +199,7 @@ class OpenAPIaiohttpClientSerializer(Serializer[Server]):
             parsed_type = schema_type.type
             if schema_type.enum:
                 serialized_type = (
-                    f'Literal[{",".join([repr(v) for v in schema_type.enum])}]'
+                    f"Literal[{','.join([repr(v) for v in schema_type.enum])}]"
                 )
             elif isinstance(parsed_type, PrimitiveType):
                 if parsed_type is PrimitiveType.STR and schema_type.format is not None:
@@ -161,6 +211,7 @@ class OpenAPIaiohttpClientSerializer(Serializer[Server]):
                             self.extra_imports.add(extra_import)
                     else:  # fallback
                         serialized_type = PrimitiveType.ANY.value
+                        self.need_typing["any"] = True
                 else:
                     serialized_type = parsed_type.value
                 if parsed_type is PrimitiveType.ANY:
@@ -173,7 +224,10 @@ class OpenAPIaiohttpClientSerializer(Serializer[Server]):
                 raise RuntimeError("Unknown type")
         else:
             serialized_type = schema_type.title
-            self.model_types.add(serialized_type)
+            if serialized_type in self.shared_types:
+                self.shared_model_types.add(serialized_type)
+            else:
+                self.model_types.add(serialized_type)
 
         return serialized_type
 
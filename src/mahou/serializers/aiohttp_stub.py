@@ -0,0 +1,159 @@
+import tempfile
+from typing import override
+
+from mahou.models.openapi import (
+    ArrayType,
+    BodySchema,
+    ComplexSchema,
+    EnumSchema,
+    PrimitiveType,
+    Schema,
+    Server,
+    SimpleSchema,
+    UnionType,
+)
+from mahou.serializers.abc import Serializer
+from mahou.serializers.aiohttp_client import server_definitions
+from mahou.utils import jinja_environment, ruff_fix, ruff_format
+
+# samples are built at runtime, `size` is the length of strings and arrays
+PRIMITIVE_SAMPLES = {
+    PrimitiveType.INT: "1",
+    PrimitiveType.FLOAT: "1.0",
+    PrimitiveType.BOOL: "True",
+    PrimitiveType.STR: "'x' * size",
+    PrimitiveType.OBJECT: "{}",
+    PrimitiveType.ANY: "None",
+    PrimitiveType.NONE: "None",
+}
+
+STR_FORMAT_SAMPLES = {
+    "uuid": "'00000000-0000-0000-0000-000000000000'",
+    "date-time": "'2000-01-01T00:00:00Z'",
+    "date": "'2000-01-01'",
+    "binary": "b'x' * size",
+}
+
+
+class OpenAPIaiohttpStubSerializer(Serializer[Server]):
+    """Serialize a stub aiohttp server and a load driver for the generated client.
+
+    The stub answers every operation with its first success response, filled
+    with schema-valid samples.
+    """
+
+    def __init__(
+        self, shared_types: set[str] | None = None, shared_module: str = "..shared"
+    ):
+        self.samples = {}
+        self.model_types = set()
+        self.shared_types = shared_types or set()
+        self.shared_module = shared_module
+        self.shared_model_types = set()
+
+    @override
+    def serialize(self, input: Server) -> str:
+        operations = {}
+
+        for path in input.paths:
+            for request in path.requests:
+                if not request.tags or request.operation_id in operations:
+                    continue
+
+                status, response = next(
+                    (
+                        (code, schema)
+                        for code, schema in request.responses.items()
+                        if code > 199 and code < 300
+                    ),
+                    (200, None),
+                )
+                binary = (
+                    isinstance(response, SimpleSchema) and response.format == "binary"
+                )
+
+                call_arguments = {
+                    parameter.name: self.sample(parameter.type)
+                    for parameter in request.parameters
+                    if parameter.required
+                }
+                if request.body:
+                    if request.body.body_schema is BodySchema.OCTET_STREAM:
+                        call_arguments["body"] = STR_FORMAT_SAMPLES["binary"]
+                    elif isinstance(request.body.type, ComplexSchema):
+                        if request.body.type.title in self.shared_types:
+                            self.shared_model_types.add(request.body.type.title)
+                        else:
+                            self.model_types.add(request.body.type.title)
+                        call_arguments["body"] = (
+                            f"{request.body.type.title}.model_validate("
+                            f"{self.sample(request.body.type)})"
+                        )
+                    else:
+                        call_arguments["body"] = self.sample(request.body.type)
+                if binary:
+                    call_arguments["sink"] = "io.BytesIO()"
+
+                operations[request.operation_id] = {
+                    "name": request.operation_id,
+                    "module": request.tags[0],
+                    "method": request.method.value,
+                    "endpoint": path.endpoint,
+                    "status": status,
+                    "binary": binary,
+                    "response": (
+                        None if response is None or binary else self.sample(response)
+                    ),
+                    "call_arguments": call_arguments,
+                }
+
+        template = jinja_environment().get_template("aiohttp_stub.py.jinja")
+
+        rendered = template.render(
+            operations=list(operations.values()),
+            samples=self.samples,
+            model_types=self.model_types,
+            shared_model_types=sorted(self.shared_model_types),
+            shared_module=self.shared_module,
+            # the load driver talks to the first server
+            session_factory=server_definitions(input)[0]["factory"],
+        )
+
+        with tempfile.NamedTemporaryFile("w") as fp:
+            fp.write(rendered)
+            fp.flush()
+            ruff_fix(fp.name)
+            ruff_format(fp.name)
+            with open(fp.name, "r") as fp2:
+                return fp2.read()
+
+    def sample(self, schema: PrimitiveType | ArrayType | UnionType | Schema) -> str:
+        if isinstance(schema, PrimitiveType):
+            return PRIMITIVE_SAMPLES[schema]
+        elif isinstance(schema, ArrayType):
+            return f"[{self.sample(schema.items)} for _ in range(size)]"
+        elif isinstance(schema, UnionType):
+            # None is valid in the union but would make a poor sample
+            any_of = [t for t in schema.any_of if t is not PrimitiveType.NONE]
+            return self.sample(any_of[0] if any_of else PrimitiveType.NONE)
+        elif isinstance(schema, SimpleSchema):
+            if schema.enum:
+                return repr(schema.enum[0])
+            if schema.type is PrimitiveType.STR and schema.format is not None:
+                return STR_FORMAT_SAMPLES.get(
+                    schema.format, PRIMITIVE_SAMPLES[schema.type]
+                )
+            return self.sample(schema.type)
+        elif isinstance(schema, EnumSchema):
+            return repr(schema.enum_values[0])
+        elif isinstance(schema, ComplexSchema):
+            if schema.title not in self.samples:
+                # reserve the name first, properties may refer to other samples
+                self.samples[schema.title] = None
+                self.samples[schema.title] = {
+                    repr(name): self.sample(property)
+                    for name, property in schema.properties.items()
+                }
+            return f"sample_{schema.title}(size)"
+        else:
+            raise RuntimeError("Unknown type")
@@ -1,8 +1,6 @@
 import re
 import tempfile
 
-from jinja2 import Environment, PackageLoader, select_autoescape
-
 from mahou.models.openapi import (
     ArrayType,
     ComplexSchema,
@@ -13,7 +11,7 @@ from mahou.models.openapi import (
     UnionType,
 )
 from mahou.serializers.abc import Serializer
-from mahou.utils import alias_invalid_id, ruff_fix, ruff_format
+from mahou.utils import alias_invalid_id, jinja_environment, ruff_fix, ruff_format
 
 STR_FORMATS = {
     "uuid": "UUID",
@@ -25,11 +23,27 @@ STR_FORMATS_IMPORTS = {
     "datetime": "from datetime import datetime",
 }
 
+# same as the generated client, files and streams are not validated
+BINARY_PAYLOAD_TYPE = "BinaryPayload"
+
+BINARY_PAYLOAD_IMPORTS = [
+    "import os",
+    "from collections.abc import AsyncIterable",
+    "from typing import IO, Annotated",
+    "from pydantic import SkipValidation",
+]
+
 
 class OpenAPIModelSerializer(Serializer[list[Schema]]):
-    def __init__(self):
+    def __init__(
+        self, shared_types: set[str] | None = None, shared_module: str = "..shared"
+    ):
         self.need_typing = {}
         self.extra_imports = set()
+        self.shared_types = shared_types or set()
+        self.shared_module = shared_module
+        self.used_shared_types = set()
+        self.binary_payload = False
 
     def serialize(self, input: list[Schema]) -> str:
         enum_forbidden_chars = re.compile("[^a-zA-Z0-9_]")
@@ -51,9 +65,12 @@ class OpenAPIModelSerializer(Serializer[list[Schema]]):
                     "name": schema.title,
                     "required_elements": [],
                     "optional_elements": [],
+                    "arbitrary_types": False,
                 }
                 for property_name, property_schema in schema.properties.items():
                     serialized_type = self.serialize_type(property_schema)
+                    if BINARY_PAYLOAD_TYPE in serialized_type:
+                        dataclass["arbitrary_types"] = True
                     name, alias = alias_invalid_id(property_name)
                     dataclass[
                         "required_elements"
@@ -71,16 +88,20 @@ class OpenAPIModelSerializer(Serializer[list[Schema]]):
             else:
                 raise RuntimeError("Unknown schema")
 
-        jinja_env = Environment(
-            loader=PackageLoader("mahou"), autoescape=select_autoescape()
-        )
-        template = jinja_env.get_template("model.py.jinja")
+        if self.used_shared_types:
+            self.extra_imports.add(
+                f"from {self.shared_module} import "
+                f"{', '.join(sorted(self.used_shared_types))}"
+            )
+
+        template = jinja_environment().get_template("model.py.jinja")
 
         rendered = template.render(
             enums=enums,
             dataclasses=dataclasses,
             need_typing=self.need_typing,
             extra_imports=self.extra_imports,
+            binary_payload=self.binary_payload,
         )
 
         # FIXME: I'm lazy
@@ -111,7 +132,11 @@ class OpenAPIModelSerializer(Serializer[list[Schema]]):
                 )
                 self.need_typing["literal"] = True
             elif isinstance(parsed_type, PrimitiveType):
-                if parsed_type is PrimitiveType.STR and schema_type.format is not None:
+                if parsed_type is PrimitiveType.STR and schema_type.format == "binary":
+                    serialized_type = BINARY_PAYLOAD_TYPE
+                    self.binary_payload = True
+                    self.extra_imports.update(BINARY_PAYLOAD_IMPORTS)
+                elif parsed_type is PrimitiveType.STR and schema_type.format:
                     match = STR_FORMATS.get(schema_type.format, None)
                     if match is not None:
                         serialized_type = match
@@ -120,6 +145,7 @@ class OpenAPIModelSerializer(Serializer[list[Schema]]):
                             self.extra_imports.add(extra_import)
                     else:  # fallback
                         serialized_type = PrimitiveType.ANY.value
+                        self.need_typing["any"] = True
                 else:
                     serialized_type = parsed_type.value
                 if parsed_type is PrimitiveType.ANY:
@@ -130,6 +156,8 @@ class OpenAPIModelSerializer(Serializer[list[Schema]]):
                 serialized_type = self.serialize_union_type(parsed_type)
             else:
                 raise RuntimeError("Unknown type")
+        elif schema_type.title in self.shared_types:
+            self.used_shared_types.add(schema_type.title)
 
         return serialized_type
 
@@ -1,8 +1,10 @@
 import os
 import re
 import subprocess
+from functools import cache
 from keyword import iskeyword
 
+from jinja2 import Environment, PackageLoader, select_autoescape
 from ruff.__main__ import find_ruff_bin
 
 
@@ -16,6 +18,12 @@ def alias_invalid_id(name: str) -> tuple[str, str | None]:
         return fixed, name
 
 
+@cache
+def jinja_environment() -> Environment:
+    # shared so that templates are only compiled once per process
+    return Environment(loader=PackageLoader("mahou"), autoescape=select_autoescape())
+
+
 def ruff_fix(path: str):
     ruff = find_ruff_bin()
     proc = subprocess.run(
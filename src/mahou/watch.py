@@ -0,0 +1,141 @@
+import argparse
+import json
+import os
+import time
+from collections.abc import Callable
+from dataclasses import dataclass, field
+
+from mahou.models.openapi import Schema, Server
+from mahou.parsers.openapi import OpenAPIParser
+from mahou.serializers.aiohttp_client import OpenAPIaiohttpClientSerializer
+from mahou.serializers.model import OpenAPIModelSerializer
+
+MODEL_FILENAME = "model.py"
+CLIENT_FILENAME = "client.py"
+
+
+@dataclass
+class WatchTarget:
+    spec: str
+    output: str
+    mtime_ns: int | None = None
+    server: Server | None = None
+    rendered: dict[str, str] = field(default_factory=dict)
+
+
+class Watcher:
+    """Regenerate clients whenever their spec changes.
+
+    The parsed IR and rendered outputs of each spec are kept in memory, so a
+    change only re-renders the output files whose part of the IR changed.
+    """
+
+    def __init__(
+        self,
+        targets: list[WatchTarget],
+        interval: float = 0.1,
+        on_generate: Callable[[WatchTarget, list[str], float], None] | None = None,
+    ):
+        self.targets = targets
+        self.interval = interval
+        self.on_generate = on_generate
+
+    def poll(self) -> list[str]:
+        written = []
+        for target in self.targets:
+            try:
+                mtime_ns = os.stat(target.spec).st_mtime_ns
+            except FileNotFoundError:
+                # editors may replace the file on save
+                continue
+            if mtime_ns == target.mtime_ns:
+                continue
+            target.mtime_ns = mtime_ns
+
+            start = time.perf_counter()
+            target_written = self.generate(target)
+            if self.on_generate:
+                self.on_generate(target, target_written, time.perf_counter() - start)
+            written += target_written
+
+        return written
+
+    def generate(self, target: WatchTarget) -> list[str]:
+        with open(target.spec, "r") as fp:
+            server = OpenAPIParser().parse(fp.read())
+
+        outputs = {}
+        previous = target.server
+        if previous is None or previous.schemas != server.schemas:
+            outputs[MODEL_FILENAME] = self.serialize_model(
+                list(server.schemas.values())
+            )
+        if previous is None or previous != server:
+            outputs[CLIENT_FILENAME] = self.serialize_client(server)
+        target.server = server
+
+        os.makedirs(target.output, exist_ok=True)
+        written = []
+        for filename, rendered in outputs.items():
+            if target.rendered.get(filename) == rendered:
+                continue
+            path = os.path.join(target.output, filename)
+            with open(path, "w") as fp:
+                fp.write(rendered)
+            target.rendered[filename] = rendered
+            written.append(path)
+
+        return written
+
+    def serialize_model(self, schemas: list[Schema]) -> str:
+        return OpenAPIModelSerializer().serialize(schemas)
+
+    def serialize_client(self, server: Server) -> str:
+        return OpenAPIaiohttpClientSerializer().serialize(server)
+
+    def run(self):
+        while True:
+            try:
+                self.poll()
+            except (json.JSONDecodeError, KeyError, ValueError) as e:
+                # the spec is probably half-saved, retry on the next change
+                print(f"generation failed: {e!r}")
+            time.sleep(self.interval)
+
+
+def main():
+    argparser = argparse.ArgumentParser(
+        prog="python -m mahou.watch",
+        description="Regenerate aiohttp clients when their OpenAPI spec changes",
+    )
+    argparser.add_argument(
+        "targets",
+        nargs="+",
+        metavar="SPEC:OUTPUT",
+        help="OpenAPI JSON spec and the directory to generate the client in",
+    )
+    argparser.add_argument(
+        "--interval", type=float, default=0.1, help="polling interval in seconds"
+    )
+    args = argparser.parse_args()
+
+    targets = []
+    for arg in args.targets:
+        spec, sep, output = arg.rpartition(":")
+        if not sep:
+            argparser.error(f"invalid target {arg}, expected SPEC:OUTPUT")
+        targets.append(WatchTarget(spec=spec, output=output))
+
+    def on_generate(target: WatchTarget, written: list[str], elapsed: float):
+        print(
+            f"{target.spec}: {len(written)} file(s) written in {elapsed * 1000:.0f}ms"
+        )
+
+    try:
+        Watcher(targets, interval=args.interval, on_generate=on_generate).run()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()